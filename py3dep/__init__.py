@@ -1,5 +1,9 @@
 """Top-level package for Py3DEP."""
+from __future__ import annotations
+
+import importlib
 from importlib.metadata import PackageNotFoundError, version
+from typing import TYPE_CHECKING, Any
 
 from py3dep.exceptions import (
     DependencyError,
@@ -9,19 +13,49 @@ from py3dep.exceptions import (
     MissingCRSError,
 )
 from py3dep.print_versions import show_versions
-from py3dep.py3dep import (
-    add_elevation,
-    check_3dep_availability,
-    elevation_bycoords,
-    elevation_bygrid,
-    elevation_profile,
-    get_dem,
-    get_dem_vrt,
-    get_map,
-    query_3dep_sources,
-    static_3dep_dem,
-)
-from py3dep.utils import deg2mpm, fill_depressions
+
+if TYPE_CHECKING:
+    from py3dep.py3dep import (
+        add_elevation,
+        check_3dep_availability,
+        elevation_bycoords,
+        elevation_bygrid,
+        elevation_profile,
+        get_dem,
+        get_dem_vrt,
+        get_map,
+        query_3dep_sources,
+        static_3dep_dem,
+    )
+    from py3dep.utils import deg2mpm, fill_depressions
+
+# The data access functions are imported on first use, so importing
+# the CLI doesn't load geopandas, pandas, and xarray.
+_LAZY_FUNCS = {
+    "add_elevation": "py3dep.py3dep",
+    "check_3dep_availability": "py3dep.py3dep",
+    "elevation_bycoords": "py3dep.py3dep",
+    "elevation_bygrid": "py3dep.py3dep",
+    "elevation_profile": "py3dep.py3dep",
+    "get_dem": "py3dep.py3dep",
+    "get_dem_vrt": "py3dep.py3dep",
+    "get_map": "py3dep.py3dep",
+    "query_3dep_sources": "py3dep.py3dep",
+    "static_3dep_dem": "py3dep.py3dep",
+    "deg2mpm": "py3dep.utils",
+    "fill_depressions": "py3dep.utils",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_FUNCS:
+        return getattr(importlib.import_module(_LAZY_FUNCS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_FUNCS})
+
 
 try:
     __version__ = version("py3dep")
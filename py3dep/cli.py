@@ -1,30 +1,113 @@
 """Command-line interface for Py3DEP."""
 from __future__ import annotations
 
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
-from typing import TYPE_CHECKING, TypeVar, cast
+from typing import TYPE_CHECKING, TypeVar
 
 import click
-import geopandas as gpd
-import pandas as pd
 
-from py3dep import py3dep
-from py3dep.exceptions import InputTypeError, MissingColumnError, MissingCRSError
-from py3dep.py3dep import LAYERS
+from py3dep._layers import LAYERS
+from py3dep.exceptions import (
+    DependencyError,
+    InputTypeError,
+    MissingColumnError,
+    MissingCRSError,
+)
 
 if TYPE_CHECKING:
+    import geopandas as gpd
+    import pandas as pd
+    import xarray as xr
+    from shapely import MultiPolygon, Polygon
+
     DFType = TypeVar("DFType", pd.DataFrame, gpd.GeoDataFrame)
 
+PYARROW_MIN_VERSION = "10.0.1"
+
+
+def has_pyarrow() -> bool:
+    """Check if ``pyarrow`` with at least the version that pandas requires is installed."""
+    try:
+        pa_version = version("pyarrow")
+    except PackageNotFoundError:
+        return False
+    installed = tuple(int(v) for v in re.findall(r"\d+", pa_version)[:3])
+    return installed >= tuple(int(v) for v in PYARROW_MIN_VERSION.split("."))
+
+
+# Files that a shapefile consists of in addition to the ``.shp`` file
+SHP_SIDECARS = (".shx", ".dbf", ".prj", ".cpg", ".qix", ".sbn", ".sbx", ".shp.xml")
+
 
 def get_target_df(tdf: DFType, req_cols: list[str]) -> DFType:
     """Check if all required columns exists in the dataframe.
 
     It also re-orders the columns based on ``req_cols`` order.
     """
-    missing = [c for c in req_cols if c not in tdf]
+    cols = set(tdf.columns)
+    missing = [c for c in req_cols if c not in cols]
     if missing:
         raise MissingColumnError(missing)
-    return tdf[req_cols]  # pyright: ignore[reportGeneralTypeIssues]
+    return tdf.loc[:, req_cols]  # pyright: ignore[reportGeneralTypeIssues]
+
+
+def to_netcdf(ds: xr.DataArray | xr.Dataset, fname: Path) -> None:
+    """Save topographic data to a chunked and compressed netCDF file."""
+    import xarray as xr
+
+    ds = ds.to_dataset() if isinstance(ds, xr.DataArray) else ds
+    encoding = {
+        name: {
+            "zlib": True,
+            "complevel": 4,
+            "chunksizes": tuple(min(512, n) for n in da.shape),
+        }
+        for name, da in ds.data_vars.items()
+    }
+    ds.to_netcdf(fname, encoding=encoding)
+
+
+def read_geometry(fpath: Path) -> gpd.GeoDataFrame:
+    """Read a geometry file and cache it as a parquet file, if ``pyarrow`` is installed.
+
+    The cache is stored in the ``cache`` directory with one entry per input file
+    which is overwritten when the input file(s) are modified.
+    """
+    import geopandas as gpd
+
+    if not has_pyarrow():
+        return gpd.read_file(fpath, engine="pyogrio")
+
+    files = [fpath]
+    if fpath.suffix.lower() == ".shp":
+        files.extend(fpath.with_suffix(ext) for ext in SHP_SIDECARS)
+    stats = (f.stat() for f in files if f.exists())
+    key = ",".join(f"{s.st_mtime_ns}:{s.st_size}" for s in stats)
+    name = hashlib.sha256(str(fpath.resolve()).encode()).hexdigest()
+    cache_path = Path("cache", f"{name}.parquet")
+    key_path = cache_path.with_suffix(".key")
+    if cache_path.exists() and key_path.exists() and key_path.read_text() == key:
+        return gpd.read_parquet(cache_path)
+
+    target_df = gpd.read_file(fpath, engine="pyogrio")
+    # Caching is best-effort since pyarrow can't convert some columns, e.g.,
+    # mixed types. Write to a temporary file first to not leave a broken cache
+    # and write the key last so an interrupted update is treated as outdated.
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        key_path.unlink(missing_ok=True)
+        target_df.to_parquet(tmp_path)
+        tmp_path.replace(cache_path)
+        key_path.write_text(key)
+    except Exception:
+        tmp_path.unlink(missing_ok=True)
+        cache_path.unlink(missing_ok=True)
+    return target_df
 
 
 CONTEXT_SETTINGS = {"help_option_names": ["-h", "--help"]}
@@ -37,7 +120,8 @@ save_arg = click.option(
     help=" ".join(
         (
             "Path to a directory to save the requested files.",
-            "Extension for the outputs is either `.nc` for geometry or `.csv` for coords.",
+            "Extension for the outputs is either `.nc` for geometry or",
+            "`.csv`/`.parquet` for coords.",
         )
     ),
 )
@@ -57,10 +141,19 @@ def cli() -> None:
     type=click.Choice(["airmap", "tnm", "tep"], case_sensitive=False),
     help="Source of the elevation data: AirMap, The National Map, or 3DEP.",
 )
+@click.option(
+    "-f",
+    "--format",
+    "out_format",
+    default="csv",
+    type=click.Choice(["csv", "parquet"], case_sensitive=False),
+    help="Output file format, parquet requires ``pyarrow``.",
+)
 @save_arg
 def coords(
     fpath: Path,
     query_source: str = "tep",
+    out_format: str = "csv",
     save_dir: str | Path = "topo_3dep",
 ) -> None:
     """Retrieve topographic data for a list of coordinates.
@@ -74,19 +167,32 @@ def coords(
         lon,lat
         -122.2493328,37.8122894
         $ py3dep coords coords.csv -q tep -s topo_dir
+        $ py3dep coords coords.csv -q tep -f parquet -s topo_dir
     """  # noqa: D301
+    import pandas as pd
+
+    from py3dep import py3dep
+
+    out_format = out_format.lower()
+    if out_format == "parquet" and not has_pyarrow():
+        raise DependencyError("pyarrow", "Saving to parquet", PYARROW_MIN_VERSION)
+
     fpath = Path(fpath)
     elev = get_target_df(pd.read_csv(fpath), ["lon", "lat"])
 
     count = "1 point" if len(elev) == 1 else f"{len(elev)} points"
     click.echo(f"Found coordinates of {count} in {fpath.resolve()}. Retrieving ... ")
 
-    coords_list = list(elev.itertuples(index=False, name=None))
-    coords_list = cast("list[tuple[float, float]]", coords_list)
+    coords_list = list(zip(elev["lon"].tolist(), elev["lat"].tolist()))
     elev["elevation"] = py3dep.elevation_bycoords(coords_list, 4326, query_source)
 
     Path(save_dir).mkdir(parents=True, exist_ok=True)
-    elev.astype("f4").to_csv(Path(save_dir, f"{fpath.stem}_elevation.csv"))
+    if out_format == "parquet":
+        elev.to_parquet(
+            Path(save_dir, f"{fpath.stem}_elevation.parquet"), engine="pyarrow", compression="zstd"
+        )
+    else:
+        elev.to_csv(Path(save_dir, f"{fpath.stem}_elevation.csv"), float_format="%.6f")
     click.echo("Done.")
 
 
@@ -100,10 +206,18 @@ def coords(
     type=click.Choice(LAYERS, case_sensitive=True),
     help="Target topographic data layers",
 )
+@click.option(
+    "-w",
+    "--max_workers",
+    default=8,
+    type=click.IntRange(min=1),
+    help="Maximum number of geometries to retrieve concurrently, defaults to 8.",
+)
 @save_arg
 def geometry(
     fpath: Path,
     layers: str | list[str] = "DEM",
+    max_workers: int = 8,
     save_dir: str | Path = "topo_3dep",
 ) -> None:
     """Retrieve topographic data within geometries.
@@ -115,29 +229,65 @@ def geometry(
         - ``res``: Target resolution in meters.
         - ``geometry``: A Polygon or MultiPloygon.
 
+    \b
+    If ``pyarrow>=10.0.1`` is installed, the input file is cached as a parquet
+    file in the ``cache`` directory for faster subsequent reads. The cached file
+    is overwritten when the input file is modified.
+
     \b
     Examples:
         $ py3dep geometry ny_geom.gpkg -l "Slope Map" -l DEM -s topo_dir
+        $ py3dep geometry ny_geom.gpkg -l DEM -w 4 -s topo_dir
     """  # noqa: D301
+    import pyproj
+
+    from py3dep import py3dep
+
     fpath = Path(fpath)
     if fpath.suffix not in (".shp", ".gpkg"):
         raise InputTypeError("file", ".shp or .gpkg")
 
-    target_df = gpd.read_file(fpath)
+    target_df = read_geometry(fpath)
     if target_df.crs is None:
         raise MissingCRSError
-    crs = target_df.crs.to_string()
-
-    target_df = get_target_df(target_df, ["id", "res", "geometry"])
-    args_list = ((g, r, Path(save_dir, f"{i}.nc")) for i, r, g in target_df.itertuples(index=False))
+    # Pass CRS objects so they don't get parsed again for each feature and
+    # reproject all the geometries at once, so get_map doesn't do it per feature
+    crs = pyproj.CRS.from_user_input(4326)
+    target_df = get_target_df(target_df, ["id", "res", "geometry"]).to_crs(crs)
 
     count = "1 geometry" if len(target_df) == 1 else f"{len(target_df)} geometries"
     click.echo(f"Found {count} in {fpath.resolve()}.")
 
+    # Features with the same id are saved to the same file, so like
+    # a serial run, only the last one is kept.
+    target_df = target_df.drop_duplicates("id", keep="last")
+    args_list = list(
+        zip(
+            target_df.geometry.to_numpy(),
+            target_df["res"].tolist(),
+            (Path(save_dir, f"{i}.nc") for i in target_df["id"].tolist()),
+        )
+    )
+
+    layers = [layers] if isinstance(layers, str) else list(layers)
+
+    def get_topo(geo: Polygon | MultiPolygon, res: float) -> xr.DataArray | xr.Dataset:
+        return py3dep.get_map(layers, geo, res, geo_crs=crs, crs=crs)
+
     Path(save_dir).mkdir(parents=True, exist_ok=True)
     with click.progressbar(
-        args_list, label="Getting topographic data from 3DEP", length=len(target_df)
-    ) as bar:
-        for geo, res, f in bar:
-            py3dep.get_map(layers, geo, res, geo_crs=crs, crs=4326).to_netcdf(f)
+        length=len(args_list), label="Getting topographic data from 3DEP"
+    ) as bar, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(get_topo, geo, res): fname for geo, res, fname in args_list}
+        try:
+            for future in as_completed(futures):
+                # netCDF-C and HDF5 are not thread-safe, so only the downloads
+                # run concurrently and the files are written in the main thread.
+                to_netcdf(future.result(), futures[future])
+                bar.update(1)
+        except BaseException:
+            # Stop as soon as a request fails instead of waiting for the queued ones
+            for f in futures:
+                f.cancel()
+            raise
     click.echo("Done.")
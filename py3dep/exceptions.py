@@ -51,15 +51,33 @@ class MissingColumnError(Exception):
 
 
 class DependencyError(ImportError):
-    """Exception raised when pyflwdir is not installed."""
+    """Exception raised when an optional dependency is not installed.
 
-    def __init__(self) -> None:
+    Parameters
+    ----------
+    library : str, optional
+        Name of the missing library, defaults to ``pyflwdir``.
+    feature : str, optional
+        The feature that requires the library, defaults to ``Depression filling``.
+    min_version : str, optional
+        The minimum required version of the library, defaults to None.
+    """
+
+    def __init__(
+        self,
+        library: str = "pyflwdir",
+        feature: str = "Depression filling",
+        min_version: str | None = None,
+    ) -> None:
+        spec = f"{library}>={min_version}" if min_version else library
         self.message = "\n".join(
             (
-                "Depression filling requires ``pyflwdir`` which can be installed by:",
-                "pip install pyflwdir",
+                f"{feature} requires ``{spec}`` which can be installed by:",
+                f'pip install "{spec}"' if min_version else f"pip install {spec}",
                 "or",
-                "conda install -c conda-forge pyflwdir",
+                f'conda install -c conda-forge "{spec}"'
+                if min_version
+                else f"conda install -c conda-forge {spec}",
             )
         )
         super().__init__(self.message)
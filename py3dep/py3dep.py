@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import contextlib
 import itertools
+from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Any, Sequence, Union, cast, overload, Literal
 
 import cytoolz.curried as tlz
@@ -21,6 +22,7 @@ from shapely import box as shapely_box
 import async_retriever as ar
 import pygeoutils as geoutils
 from py3dep import utils
+from py3dep._layers import LAYERS
 from py3dep.exceptions import (
     InputRangeError,
     InputTypeError,
@@ -36,20 +38,6 @@ if TYPE_CHECKING:
 
     CRSTYPE = Union[int, str, pyproj.CRS]
 
-LAYERS = [
-    "DEM",
-    "Hillshade Gray",
-    "Aspect Degrees",
-    "Aspect Map",
-    "GreyHillshade_elevationFill",
-    "Hillshade Multidirectional",
-    "Slope Map",
-    "Slope Degrees",
-    "Hillshade Elevation Tinted",
-    "Height Ellipsoidal",
-    "Contour 25",
-    "Contour Smoothed 25",
-]
 __all__ = [
     "get_map",
     "elevation_bygrid",
@@ -717,6 +705,7 @@ def query_3dep_sources(
             return geoutils.json2geodf(client.get_features(oids))
         return None
 
-    src = pd.concat({res: _check(lyr) for res, lyr in layers.items()})
+    with ThreadPoolExecutor(max_workers=len(layers)) as executor:
+        src = pd.concat(dict(zip(layers, executor.map(_check, layers.values()))))
     src = gpd.GeoDataFrame(src.reset_index(level=1, drop=True), crs=4326)
     return src.reset_index().rename(columns={"index": "dem_res"})
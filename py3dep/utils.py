@@ -1,6 +1,7 @@
 """Utilities for Py3DEP."""
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import TYPE_CHECKING, Literal, Sequence, Union, overload
 
 import numpy as np
@@ -14,6 +15,7 @@ if TYPE_CHECKING:
 from py3dep.exceptions import DependencyError
 
 __all__ = ["deg2mpm", "fill_depressions"]
+_DEG2RAD = np.pi / 180.0
 
 
 def fill_depressions(dem: xr.DataArray, outlets: Literal["min", "edge"] = "min") -> xr.DataArray:
@@ -41,15 +43,33 @@ def fill_depressions(dem: xr.DataArray, outlets: Literal["min", "edge"] = "min")
         import pyflwdir
     except ImportError as ex:
         raise DependencyError from ex
-    dem = dem.astype("f8")
     attrs = dem.attrs
-    filled, _ = pyflwdir.dem.fill_depressions(dem.values, outlets=outlets, nodata=np.nan)
+    # Avoid copying the data when it's already float64 since pyflwdir
+    # doesn't modify its input. Only copy it if nodata needs to be masked.
+    values = dem.to_numpy()
+    arr = values.astype("f8", copy=False)
+    nodata = dem.rio.nodata
+    if nodata is not None and not np.isnan(nodata):
+        if arr is values:
+            arr = arr.copy()
+        np.putmask(arr, arr == nodata, np.nan)
+    filled, _ = pyflwdir.dem.fill_depressions(arr, outlets=outlets, nodata=np.nan)
     dem = dem.copy(data=filled)
     dem.attrs = attrs
     dem = dem.rio.write_nodata(np.nan)
     return dem
 
 
+def _get_nodata(da: xr.DataArray) -> float:
+    """Get the nodata value of a DataArray from its attributes."""
+    if "_FillValue" in da.attrs:
+        return da.attrs["_FillValue"]
+    if "nodatavals" in da.attrs:
+        nodata = da.attrs["nodatavals"]
+        return nodata[0] if isinstance(nodata, Sequence) else nodata
+    return np.nan
+
+
 def deg2mpm(slope: xr.DataArray) -> xr.DataArray:
     """Convert slope from degrees to meter/meter.
 
@@ -64,33 +84,38 @@ def deg2mpm(slope: xr.DataArray) -> xr.DataArray:
         Slope in meter/meter. The name is set to ``slope`` and the ``units`` attribute
         is set to ``m/m``.
     """
-    with xr.set_options(keep_attrs=True):
-        if hasattr(slope, "_FillValue"):
-            nodata = slope.attrs["_FillValue"]
-        elif hasattr(slope, "nodatavals"):
-            _nodata = slope.attrs["nodatavals"]
-            nodata = _nodata[0] if isinstance(_nodata, Sequence) else _nodata
-        else:
-            nodata = np.nan
-        slope = slope.where(slope != nodata, drop=False)
-
-        def to_mpm(da: xr.DataArray) -> xr.DataArray:
-            """Convert slope from degrees to meter/meter."""
-            return xr.apply_ufunc(
-                lambda x: np.tan(np.deg2rad(x)),
-                da,
-                vectorize=True,
-            )
-
-        slope = to_mpm(slope).compute()
-        slope.attrs["nodatavals"] = (np.nan,)
-        if hasattr(slope, "_FillValue"):
-            slope.attrs["_FillValue"] = np.nan
-        slope.name = "slope"
-        slope.attrs["units"] = "m/m"
+    nodata = _get_nodata(slope)
+
+    # Work on a single copy so the input is left untouched. NaN nodata
+    # propagates through tan, so only other nodata values need masking.
+    arr = slope.to_numpy().astype(np.result_type(slope.dtype, np.float32))
+    if not np.isnan(nodata):
+        np.putmask(arr, arr == nodata, np.nan)
+    np.multiply(arr, _DEG2RAD, out=arr)
+    np.tan(arr, out=arr)
+
+    attrs = {**slope.attrs, "nodatavals": (np.nan,), "units": "m/m"}
+    if "_FillValue" in attrs:
+        attrs["_FillValue"] = np.nan
+    slope = slope.copy(deep=False, data=arr)
+    slope.attrs = attrs
+    slope.name = "slope"
     return slope
 
 
+def _layer_name(layer: str) -> str:
+    """Get the variable name of a 3DEP layer."""
+    if layer == "3DEPElevation:None":
+        return "elevation"
+    return layer.split(":")[-1].replace(" ", "_").lower()
+
+
+@lru_cache(maxsize=None)
+def _layer_names(valid_layers: tuple[str, ...]) -> dict[str, str]:
+    """Get a mapping of the 3DEP layer names to variable names."""
+    return {lyr: _layer_name(lyr) for lyr in (*valid_layers, "3DEPElevation:None")}
+
+
 @overload
 def rename_layers(ds: xr.DataArray, valid_layers: list[str]) -> xr.DataArray:
     ...
@@ -105,11 +130,12 @@ def rename_layers(
     ds: xr.DataArray | xr.Dataset, valid_layers: list[str]
 ) -> xr.DataArray | xr.Dataset:
     """Rename layers in a dataset."""
-    rename = {lyr: lyr.split(":")[-1].replace(" ", "_").lower() for lyr in valid_layers}
-    rename.update({"3DEPElevation:None": "elevation"})
-
     if isinstance(ds, xr.DataArray):
-        ds.name = rename[str(ds.name)]
+        name = str(ds.name)
+        if name != "3DEPElevation:None" and name not in valid_layers:
+            raise KeyError(name)
+        ds.name = _layer_name(name)
     else:
+        rename = _layer_names(tuple(valid_layers))
         ds = ds.rename({n: rename[str(n)] for n in ds})
     return ds
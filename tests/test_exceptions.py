@@ -26,3 +26,23 @@ def test_wrong_crs():
     geom = GEOM.bounds
     with pytest.raises(InputValueError, match="crs"):
         _ = py3dep.get_map("DEM", geom, 1e3, DEF_CRS, "ESRI:102003")
+
+
+@pytest.mark.parametrize("pa_version", [None, "1.0.1"])
+def test_parquet_no_pyarrow(runner, monkeypatch, tmp_path, pa_version):
+    from importlib.metadata import PackageNotFoundError
+
+    from py3dep import DependencyError
+    from py3dep import cli as py3dep_cli
+
+    def version(name):
+        if pa_version is None:
+            raise PackageNotFoundError(name)
+        return pa_version
+
+    monkeypatch.setattr(py3dep_cli, "version", version)
+    coord_csv = tmp_path / "coords.csv"
+    coord_csv.write_text("lon,lat\n-69.77,45.07\n")
+    ret = runner.invoke(py3dep_cli.cli, ["coords", str(coord_csv), "-f", "parquet"])
+    assert isinstance(ret.exception, DependencyError)
+    assert f"pyarrow>={py3dep_cli.PYARROW_MIN_VERSION}" in str(ret.exception)
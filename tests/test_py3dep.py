@@ -1,6 +1,9 @@
+import glob
 import io
+import os
 import shutil
 import subprocess
+import sys
 from pathlib import Path
 
 import geopandas as gpd
@@ -82,6 +85,21 @@ def test_fill_depressions():
     assert_close(ds.mean().item(), 296.9658)
 
 
+@pytest.mark.parametrize("dtype", ["f4", "f8"])
+def test_fill_depressions_nodata(dtype):
+    data = np.full((5, 5), 10.0, dtype=dtype)
+    data[2, 2] = 5.0
+    data[0, 0] = -9999.0
+    dem = xr.DataArray(data, dims=("y", "x"), coords={"y": np.arange(5), "x": np.arange(5)})
+    dem = dem.rio.write_nodata(-9999.0)
+    original = dem.copy(deep=True)
+    filled = py3dep.fill_depressions(dem)
+    xr.testing.assert_identical(dem, original)
+    assert np.isnan(filled[0, 0])
+    assert np.isnan(filled.rio.nodata)
+    assert_close(filled[2, 2].item(), 10.0)
+
+
 @pytest.mark.parametrize(
     ("source", "expected"),
     [("airmap", 363), ("tnm", 356.093), ("tep", 356.139)],
@@ -98,6 +116,49 @@ def test_deg2mpm():
     assert_close(slope.mean().item(), 0.0505)
 
 
+@pytest.mark.parametrize(
+    ("data", "attrs", "dtype"),
+    [
+        ([[45.0, -9999.0], [0.0, 60.0]], {"_FillValue": -9999.0}, "f4"),
+        ([[45.0, -9999.0], [0.0, 60.0]], {"nodatavals": (-9999.0,)}, "f8"),
+        ([[45.0, np.nan], [0.0, 60.0]], {"nodatavals": (np.nan,)}, "f4"),
+        ([[45.0, np.nan], [0.0, 60.0]], {}, "f8"),
+        ([[45, -9999], [0, 60]], {"_FillValue": -9999}, "i2"),
+    ],
+)
+def test_deg2mpm_nodata(data, attrs, dtype):
+    slope = xr.DataArray(np.array(data, dtype=dtype), dims=("y", "x"), attrs=attrs, name="lyr")
+    original = slope.copy(deep=True)
+    mpm = py3dep.deg2mpm(slope)
+    xr.testing.assert_identical(slope, original)
+    assert mpm.dtype == np.result_type(dtype, np.float32)
+    expected = np.array([[1.0, np.nan], [0.0, np.sqrt(3)]])
+    assert np.allclose(mpm.to_numpy(), expected, equal_nan=True)
+    assert mpm.name == "slope"
+    assert mpm.attrs["units"] == "m/m"
+    assert np.isnan(mpm.attrs["nodatavals"][0])
+    if "_FillValue" in attrs:
+        assert np.isnan(mpm.attrs["_FillValue"])
+    else:
+        assert "_FillValue" not in mpm.attrs
+
+
+def test_rename_layers():
+    from py3dep.utils import rename_layers
+
+    valid = ["3DEPElevation:Slope Degrees", "3DEPElevation:Hillshade Gray"]
+    da = rename_layers(xr.DataArray([1.0], name="3DEPElevation:None"), valid)
+    assert da.name == "elevation"
+    da = rename_layers(xr.DataArray([1.0], name="3DEPElevation:Slope Degrees"), valid)
+    assert da.name == "slope_degrees"
+    ds = xr.Dataset(
+        {"3DEPElevation:None": ("x", [1.0]), "3DEPElevation:Hillshade Gray": ("x", [1.0])}
+    )
+    assert sorted(rename_layers(ds, valid)) == ["elevation", "hillshade_gray"]
+    with pytest.raises(KeyError):
+        rename_layers(xr.DataArray([1.0], name="3DEPElevation:Aspect Map"), valid)
+
+
 def test_grid():
     crs = (
         "+proj=lcc +lat_1=25 +lat_2=60 +lat_0=42.5 +lon_0=-100 +x_0=0 +y_0=0 +ellps=WGS84 +units=m"
@@ -143,6 +204,120 @@ def test_query_3dep_source():
     assert res_1m == {"1m": 3}
 
 
+def test_query_3dep_source_offline(monkeypatch):
+    from pygeoogc import ZeroMatchedError
+
+    class ArcGISRESTful:
+        def __init__(self, url, layer, outformat):
+            self.layer = layer
+
+        def oids_bygeom(self, geom, geo_crs):
+            if self.layer == 19:
+                raise ZeroMatchedError
+            return list(range(self.layer % 3 + 1))
+
+        def get_features(self, oids):
+            return oids
+
+    def json2geodf(oids):
+        return gpd.GeoDataFrame({"OBJECTID": oids}, geometry=[GEOM] * len(oids), crs=DEF_CRS)
+
+    monkeypatch.setattr("py3dep.py3dep.ArcGISRESTful", ArcGISRESTful)
+    monkeypatch.setattr("py3dep.py3dep.geoutils.json2geodf", json2geodf)
+    src = py3dep.query_3dep_sources(GEOM.bounds)
+    res_all = src.groupby("dem_res")["OBJECTID"].count().to_dict()
+    assert res_all == {"1m": 1, "5m": 3, "10m": 1, "30m": 2, "60m": 3, "topobathy": 1}
+    assert src.crs.to_epsg() == 4326
+    src = py3dep.query_3dep_sources(GEOM.bounds, res=["3m", "30m"])
+    assert src.groupby("dem_res")["OBJECTID"].count().to_dict() == {"30m": 2}
+
+
+@pytest.mark.parametrize("fname", ["geo.gpkg", "geo[2020].gpkg", "geo.shp"])
+def test_read_geometry_cache(fname, tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    from py3dep.cli import read_geometry
+
+    monkeypatch.chdir(tmp_path)
+    fpath = Path(fname)
+    gdf = gpd.GeoDataFrame({"id": ["a"], "res": [1e3]}, geometry=[GEOM], crs=DEF_CRS)
+    gdf.to_file(fpath)
+    assert read_geometry(fpath)["id"].tolist() == ["a"]
+    assert len(list(Path("cache").glob("*.parquet"))) == 1
+
+    # Cache hit: the input file is not read again and unrelated files are ignored
+    Path(f"{fpath.stem}.csv").write_text("id\na\n")
+    read_file = gpd.read_file
+    monkeypatch.setattr(gpd, "read_file", lambda *_, **__: pytest.fail("Cache was not used"))
+    assert read_geometry(fpath)["id"].tolist() == ["a"]
+    monkeypatch.setattr(gpd, "read_file", read_file)
+
+    # Modifying the input file invalidates the cache
+    gdf.assign(id=["b"]).to_file(fpath)
+    for f in Path().glob(f"{glob.escape(fpath.stem)}.*"):
+        st = f.stat()
+        os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert read_geometry(fpath)["id"].tolist() == ["b"]
+    assert len(list(Path("cache").glob("*.parquet"))) == 1
+
+
+def test_read_geometry_cache_fallback(tmp_path, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    from py3dep.cli import read_geometry
+
+    monkeypatch.chdir(tmp_path)
+    fpath = Path("geo.gpkg")
+    gpd.GeoDataFrame({"id": ["a"]}, geometry=[GEOM], crs=DEF_CRS).to_file(fpath)
+
+    def to_parquet(*_, **__):
+        raise pa.ArrowTypeError
+
+    monkeypatch.setattr(gpd.GeoDataFrame, "to_parquet", to_parquet)
+    assert read_geometry(fpath)["id"].tolist() == ["a"]
+    assert not list(Path("cache").iterdir())
+
+
+def test_to_netcdf_encoding(tmp_path):
+    from py3dep.cli import to_netcdf
+
+    da = xr.DataArray(np.ones((600, 20)), dims=("y", "x"), name="elevation")
+    fname = tmp_path / "dem.nc"
+    to_netcdf(da, fname)
+    with xr.open_dataset(fname) as ds:
+        assert ds["elevation"].encoding["zlib"]
+        assert ds["elevation"].encoding["chunksizes"] == (512, 20)
+
+
+def test_geometry_cli_writes(runner, tmp_path, monkeypatch):
+    import threading
+
+    from py3dep import cli as py3dep_cli
+
+    monkeypatch.chdir(tmp_path)
+    writers = set()
+    to_netcdf = py3dep_cli.to_netcdf
+
+    def get_map(layers, geometry, resolution, geo_crs, crs):
+        return xr.Dataset({lyr: (("y", "x"), np.full((3, 4), resolution)) for lyr in layers})
+
+    def write(ds, fname):
+        writers.add(threading.get_ident())
+        to_netcdf(ds, fname)
+
+    monkeypatch.setattr("py3dep.py3dep.get_map", get_map)
+    monkeypatch.setattr(py3dep_cli, "to_netcdf", write)
+    gdf = gpd.GeoDataFrame(
+        {"id": ["a", "b", "a", "c"], "res": [1.0, 2.0, 3.0, 4.0]}, geometry=[GEOM] * 4, crs=DEF_CRS
+    )
+    gdf.to_file("geo.gpkg")
+    ret = runner.invoke(py3dep_cli.cli, ["geometry", "geo.gpkg", "-w", "4", "-s", "out"])
+    assert ret.exit_code == 0
+    assert "Found 4 geometries" in ret.output
+    assert writers == {threading.main_thread().ident}
+    assert sorted(p.name for p in Path("out").glob("*.nc")) == ["a.nc", "b.nc", "c.nc"]
+    with xr.open_dataset(Path("out", "a.nc")) as ds:
+        assert ds["DEM"].max().item() == 3.0
+
+
 class TestCLI:
     """Test the command-line interface."""
 
@@ -163,6 +338,25 @@ class TestCLI:
         assert "Found 1 geometry" in ret.output
         shutil.rmtree("geo_map")
 
+    def test_geometry_multi(self, runner):
+        gdf = gpd.GeoDataFrame(
+            {"id": ["geo_1", "geo_2", "geo_3"], "res": [1e3, 1e3, 1e3]},
+            geometry=[GEOM, GEOM.buffer(-0.05), GEOM.buffer(-0.1)],
+            crs=DEF_CRS,
+        )
+        geo_gpkg = Path("nat_geo_multi.gpkg")
+        gdf.to_file(geo_gpkg)
+        ret = runner.invoke(cli, ["geometry", str(geo_gpkg), "-w", "3", "-s", "geo_map_multi"])
+        geo_gpkg.unlink()
+        assert ret.exit_code == 0
+        assert "Found 3 geometries" in ret.output
+        assert sorted(p.name for p in Path("geo_map_multi").glob("*.nc")) == [
+            "geo_1.nc",
+            "geo_2.nc",
+            "geo_3.nc",
+        ]
+        shutil.rmtree("geo_map_multi")
+
     def test_coords(self, runner):
         df = pd.DataFrame(
             [[-69.77, 45.07], [-69.31, 45.07], [-69.31, 45.45]], columns=["lon", "lat"]
@@ -170,12 +364,30 @@ class TestCLI:
         coord_csv = "coords.csv"
         df.to_csv(coord_csv)
         ret = runner.invoke(cli, ["coords", coord_csv, "-s", "geo_coords", "-q", "airmap"])
+        ret_pq = runner.invoke(
+            cli, ["coords", coord_csv, "-s", "geo_coords", "-q", "airmap", "-f", "parquet"]
+        )
         Path(coord_csv).unlink()
         assert ret.exit_code == 0
         assert "Found coordinates of 3 points" in ret.output
+        assert ret_pq.exit_code == 0
+        elev = pd.read_parquet(Path("geo_coords", "coords_elevation.parquet"))
+        assert list(elev.columns) == ["lon", "lat", "elevation"]
+        assert len(elev) == 3
         shutil.rmtree("geo_coords")
 
 
+def test_cli_lazy_imports():
+    code = "; ".join(
+        (
+            "import sys, py3dep.cli",
+            "print(sorted({'pandas', 'geopandas', 'xarray'} & set(sys.modules)))",
+        )
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
 def test_show_versions():
     f = io.StringIO()
     py3dep.show_versions(file=f)